@@ -1,4 +1,4 @@
-
+"""
 EXPLAINIUM Image Processing Module
 
 This module provides image processing and OCR capabilities including:
@@ -8,111 +8,469 @@ This module provides image processing and OCR capabilities including:
 - Image quality optimization for better OCR results
 """
 
+import asyncio
 import logging
+import multiprocessing
+import os
+import queue
+import re
+import shlex
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import cv2
 import numpy as np
 import pytesseract
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image
 from fastapi import UploadFile, HTTPException
-from typing import Optional, Dict, List, Tuple
+from fastapi.concurrency import run_in_threadpool
+from typing import BinaryIO, Optional, Dict, List, Tuple, Union
+from dataclasses import dataclass, field
 import io
 
+# Keep Tesseract single-threaded per call so it does not oversubscribe the API worker threads
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def preprocess_image_for_ocr(image: Image.Image) -> Image.Image:
+# Tesseract configs, built once. The character whitelist is opt-in: it defeats
+# Tesseract's language model and tends to cost both accuracy and speed.
+TESS_CONFIG = '--oem 3 --psm 6'
+REGION_TESS_CONFIG = '--oem 3 --psm 11'
+OCR_CHAR_WHITELIST = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,!?-()[]{}:;\"' "
+TESS_WHITELIST_CONFIG = f"{TESS_CONFIG} -c {shlex.quote(f'tessedit_char_whitelist={OCR_CHAR_WHITELIST}')}"
+
+# OCR process pool for concurrent requests, one Tesseract worker per core
+OCR_WORKERS = int(os.getenv('OCR_WORKERS', os.cpu_count() or 1))
+_ocr_pool = None
+_ocr_semaphore = None
+
+# Images above this variance (with mid-range brightness) are OCR'd without preprocessing in 'auto' mode
+AUTO_PREPROCESS_MIN_VARIANCE = 2500
+AUTO_PREPROCESS_THUMBNAIL = 256
+
+# Whitespace around line breaks (including blank lines) in OCR output
+OCR_LINE_BREAK_RE = re.compile(r'\s*\n\s*')
+
+# Images at least this size on both sides are subsampled for quality statistics
+QUALITY_SAMPLE_MIN_SIZE = 512
+
+# Longest image side fed to Tesseract; larger images are downscaled first
+OCR_MAX_DIMENSION = 2000
+
+# Decoded images above this many pixels get a file-backed grayscale array. Kept well
+# under Pillow's MAX_IMAGE_PIXELS (~89M px; decoding warns above it and fails at twice it).
+MEMMAP_PIXEL_THRESHOLD = 2 ** 25
+MEMMAP_CHUNK_ROWS = 1024
+
+# PIL ImageFilter.SHARPEN kernel, applied with cv2.filter2D
+SHARPEN_KERNEL = np.array([[-2, -2, -2], [-2, 32, -2], [-2, -2, -2]], dtype=np.float32) / 16
+
+# Persistent Tesseract engines (tesserocr) matching TESS_CONFIG. A PyTessBaseAPI is not
+# thread-safe, so threads check one out of this pool; engines are created on demand,
+# up to OCR_WORKERS, and reused across requests.
+_tess_apis = queue.LifoQueue()
+_tess_api_count = 0
+_tess_lock = threading.Lock()
+
+def _create_tess_api():
+    """Create a tesserocr API, loading the language model"""
+    return tesserocr.PyTessBaseAPI(
+        lang='eng',
+        psm=tesserocr.PSM.SINGLE_BLOCK,
+        oem=tesserocr.OEM.DEFAULT
+    )
+
+def _acquire_tess_api():
+    """Take an idle engine from the pool, creating one if the pool is not yet full"""
+    global _tess_api_count
+    try:
+        return _tess_apis.get_nowait()
+    except queue.Empty:
+        pass
+    
+    with _tess_lock:
+        can_create = _tess_api_count < OCR_WORKERS
+        if can_create:
+            _tess_api_count += 1
+    if not can_create:
+        return _tess_apis.get()
+    
+    try:
+        return _create_tess_api()
+    except Exception:
+        with _tess_lock:
+            _tess_api_count -= 1
+        raise
+
+def run_ocr(image: Image.Image, config: str = TESS_CONFIG) -> str:
     """
-    Preprocess image to improve OCR accuracy
+    Run Tesseract OCR on an image
+    
+    Uses the in-process tesserocr engine when installed and the default
+    config is requested, avoiding a tesseract subprocess and model reload
+    per call; other configs and installs without tesserocr use pytesseract.
+    
+    Args:
+        image: PIL Image object
+        config: Tesseract command-line config string
+        
+    Returns:
+        Raw recognized text
+    """
+    if tesserocr is None or config != TESS_CONFIG:
+        return pytesseract.image_to_string(image, config=config)
+    
+    api = _acquire_tess_api()
+    try:
+        api.SetImage(image)
+        return api.GetUTF8Text()
+    finally:
+        _tess_apis.put(api)
+
+@dataclass
+class LoadedImage:
+    """Uploaded image decoded once and shared by the pipeline"""
+    filename: str
+    image: Image.Image
+    file_size: int
+    source: BinaryIO
+    _gray: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    
+    @property
+    def gray(self) -> np.ndarray:
+        """Grayscale pixels, computed on first access and shared by every pipeline step"""
+        if self._gray is None:
+            self._gray = grayscale_array(self.image)
+        return self._gray
+
+def load_image_once(file: UploadFile) -> LoadedImage:
+    """
+    Decode an uploaded image a single time
+    
+    PIL reads straight from the upload's spooled file, so the encoded bytes
+    are never copied into memory just to be decoded.
+    
+    Args:
+        file: Uploaded image file
+        
+    Returns:
+        LoadedImage holding the decoded PIL image and upload details
+    """
+    file.file.seek(0, os.SEEK_END)
+    file_size = file.file.tell()
+    file.file.seek(0)
+    image = Image.open(file.file)
+    image.load()
+    return LoadedImage(filename=file.filename, image=image, file_size=file_size, source=file.file)
+
+def read_image_bytes(file: Union[UploadFile, LoadedImage]) -> bytes:
+    """Read an upload's raw encoded bytes; blocking, as spooled uploads above 1 MB live on disk"""
+    source = file.source if isinstance(file, LoadedImage) else file.file
+    source.seek(0)
+    return source.read()
+
+def _as_loaded(source: Union[UploadFile, LoadedImage]) -> LoadedImage:
+    """Accept either an UploadFile or an already loaded image"""
+    if isinstance(source, LoadedImage):
+        return source
+    return load_image_once(source)
+
+def grayscale_array(image: Image.Image) -> np.ndarray:
+    """
+    Get an image's grayscale pixels as a 2-D uint8 array
+    
+    Large images (above MEMMAP_PIXEL_THRESHOLD pixels) are converted band by
+    band, MEMMAP_CHUNK_ROWS rows at a time, into a file-backed numpy.memmap,
+    so no full-size grayscale copy is held in RAM next to the decoded
+    image. The decoded image itself still has to fit in memory. NumPy and
+    OpenCV accept the memmap like any other array.
     
     Args:
         image: PIL Image object
         
+    Returns:
+        Grayscale uint8 array of shape (height, width)
+    """
+    width, height = image.size
+    if width * height <= MEMMAP_PIXEL_THRESHOLD:
+        return np.asarray(image if image.mode == 'L' else image.convert('L'))
+    
+    # mmap keeps its own handle, so the (already unlinked) temp file can be closed here
+    with tempfile.TemporaryFile() as tmp:
+        pixels = np.memmap(tmp, dtype=np.uint8, mode='w+', shape=(height, width))
+    for top in range(0, height, MEMMAP_CHUNK_ROWS):
+        bottom = min(top + MEMMAP_CHUNK_ROWS, height)
+        band = image.crop((0, top, width, bottom))
+        pixels[top:bottom] = np.asarray(band if band.mode == 'L' else band.convert('L'))
+    return pixels
+
+def limit_image_size(gray: np.ndarray, max_dimension: int = OCR_MAX_DIMENSION) -> Tuple[np.ndarray, float]:
+    """
+    Downscale a grayscale array so its longest side is at most max_dimension
+    
+    Tesseract runtime grows with pixel count while accuracy plateaus well
+    below phone-camera resolutions, so oversized images are shrunk with
+    INTER_AREA before OCR.
+    
+    Args:
+        gray: Grayscale uint8 array
+        max_dimension: Maximum width/height in pixels
+        
+    Returns:
+        Tuple of (possibly resized array, scale factor applied)
+    """
+    height, width = gray.shape[:2]
+    scale = min(1.0, max_dimension / max(height, width))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+    return gray, scale
+
+def preprocess_image_for_ocr(image: Union[Image.Image, np.ndarray]) -> Image.Image:
+    """
+    Preprocess image to improve OCR accuracy
+    
+    Args:
+        image: PIL Image object, or an already computed grayscale uint8 array
+        
     Returns:
         Preprocessed PIL Image object
     """
     try:
         # Convert to grayscale if needed
-        if image.mode != 'L':
-            image = image.convert('L')
-        
-        # Enhance contrast
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(2.0)
+        if isinstance(image, np.ndarray):
+            gray = image
+        else:
+            if image.mode != 'L':
+                image = image.convert('L')
+            gray = np.asarray(image, dtype=np.uint8)
         
-        # Apply slight sharpening
-        image = image.filter(ImageFilter.SHARPEN)
+        # Cap resolution; OCR time scales with pixel count
+        gray, _ = limit_image_size(gray)
         
-        # Convert to OpenCV format for advanced preprocessing
-        cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_GRAY2BGR)
+        # Enhance contrast around the mean (same as PIL ImageEnhance.Contrast(2.0)).
+        # The input may be shared (LoadedImage.gray), so this writes a fresh buffer.
+        mean = cv2.mean(gray)[0]
+        contrasted = cv2.addWeighted(gray, 2.0, gray, 0.0, -mean)
+        del gray
         
-        # Apply Gaussian blur to reduce noise
-        cv_image = cv2.GaussianBlur(cv_image, (1, 1), 0)
+        # Apply slight sharpening (no blur afterwards: the original 1x1 Gaussian was a no-op)
+        work = cv2.filter2D(contrasted, -1, SHARPEN_KERNEL)
+        del contrasted
         
-        # Apply threshold to get binary image
-        gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Apply threshold to get binary image, in place
+        cv2.threshold(work, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=work)
         
         # Convert back to PIL
-        return Image.fromarray(thresh)
+        return Image.fromarray(work)
         
     except Exception as e:
         logger.warning(f"Image preprocessing failed, using original: {e}")
-        return image
+        return Image.fromarray(image) if isinstance(image, np.ndarray) else image
 
-def extract_text_from_image(file: UploadFile, preprocess: bool = True) -> Optional[str]:
+def needs_preprocessing(image: Image.Image) -> bool:
+    """
+    Decide whether an image benefits from OCR preprocessing
+    
+    Clean, well-exposed images (screenshots, rendered pages) OCR faster and
+    as well or better without binarization. The check runs on a small
+    thumbnail so it costs far less than the preprocessing it may skip.
+    
+    Args:
+        image: PIL Image object
+        
+    Returns:
+        False when the image already has high contrast and mid-range brightness
+    """
+    scale = min(1.0, AUTO_PREPROCESS_THUMBNAIL / max(image.size))
+    if scale < 1.0:
+        image = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))), Image.BILINEAR)
+    gray = np.asarray(image.convert('L'))
+    
+    variance = float(np.var(gray))
+    mean_brightness = float(np.mean(gray))
+    return not (variance > AUTO_PREPROCESS_MIN_VARIANCE and 80 < mean_brightness < 180)
+
+def _ocr_loaded(loaded: LoadedImage, preprocess: Union[bool, str], tess_config: str) -> str:
+    """
+    Preprocess (optionally) and OCR a decoded image, returning raw Tesseract output
+    
+    The grayscale array is only built once the preprocessing decision is made.
+    Unpreprocessed images are still OCR'd as size-capped grayscale, so large
+    clean photos are not fed to Tesseract at full resolution, and modes that
+    Tesseract cannot take (CMYK, LA, I;16) never reach it.
+    """
+    if preprocess == 'auto':
+        preprocess = needs_preprocessing(loaded.image)
+    if preprocess:
+        image = preprocess_image_for_ocr(loaded.gray)
+    else:
+        image = Image.fromarray(limit_image_size(loaded.gray)[0])
+    
+    return run_ocr(image, config=tess_config)
+
+def _load_image_bytes(image_bytes: bytes, filename: str) -> LoadedImage:
+    """Decode encoded image bytes (as sent to the OCR process pool)"""
+    source = io.BytesIO(image_bytes)
+    image = Image.open(source)
+    image.load()
+    return LoadedImage(filename=filename, image=image, file_size=len(image_bytes), source=source)
+
+def _analyze_worker(image_bytes: bytes, filename: str, preprocess: Union[bool, str],
+                    tess_config: str) -> Tuple[str, Dict, Dict]:
+    """Decode image bytes once, then OCR, describe and assess them; runs inside the OCR process pool"""
+    loaded = _load_image_bytes(image_bytes, filename)
+    text = _ocr_loaded(loaded, preprocess, tess_config)
+    return text, get_image_metadata(loaded), detect_image_quality(loaded)
+
+def _clean_ocr_text(text: str, filename: str) -> Optional[str]:
+    """Strip blank lines from OCR output, returning None when too little text was found"""
+    cleaned_text = OCR_LINE_BREAK_RE.sub('\n', text).strip()
+    
+    if len(cleaned_text) < 3:
+        logger.warning(f"Little or no text extracted from image: {filename}")
+        return None
+        
+    logger.info(f"Successfully extracted {len(cleaned_text)} characters from image: {filename}")
+    return cleaned_text
+
+def _get_ocr_pool() -> ProcessPoolExecutor:
+    """
+    Return the OCR process pool, creating it on first use
+    
+    Workers are spawned rather than forked: the server process already runs
+    threads (the request threadpool, tesserocr engine locks) by the time the
+    first image arrives, and forking a threaded process is unsafe.
+    """
+    global _ocr_pool
+    if _ocr_pool is None:
+        _ocr_pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _ocr_pool
+
+def _get_ocr_semaphore() -> asyncio.Semaphore:
+    """
+    Return the semaphore limiting uploads between reading their bytes and finishing OCR
+    
+    Held from before the upload is read into memory, so at most OCR_WORKERS
+    encoded images are resident at once; the executor alone would queue any
+    number of them.
+    """
+    global _ocr_semaphore
+    if _ocr_semaphore is None:
+        _ocr_semaphore = asyncio.Semaphore(OCR_WORKERS)
+    return _ocr_semaphore
+
+def _discard_ocr_pool(pool: ProcessPoolExecutor):
+    """Shut down an OCR pool and, if it is still the current one, let the next call create a new one"""
+    global _ocr_pool
+    if _ocr_pool is pool:
+        _ocr_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_ocr_pool():
+    """Stop the OCR worker processes, if they were started"""
+    global _ocr_semaphore
+    if _ocr_pool is not None:
+        _discard_ocr_pool(_ocr_pool)
+    _ocr_semaphore = None
+
+async def _run_in_ocr_pool(func, *args):
+    """
+    Run func(*args) on the OCR pool
+    
+    A worker that dies (e.g. out of memory on a huge image) breaks the whole
+    pool. The job running at the time is failed rather than retried, since
+    its input is the likely cause, and the broken pool is discarded. A job
+    submitted to a pool that was already broken never ran, so it moves to a
+    fresh pool instead, and later uploads do not keep failing until restart.
+    """
+    pool = _get_ocr_pool()
+    loop = asyncio.get_running_loop()
+    try:
+        future = loop.run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        logger.warning("OCR worker pool broke; restarting it")
+        _discard_ocr_pool(pool)
+        pool = _get_ocr_pool()
+        future = loop.run_in_executor(pool, func, *args)
+    
+    try:
+        return await future
+    except BrokenProcessPool:
+        _discard_ocr_pool(pool)
+        raise
+
+def extract_text_from_image(file: Union[UploadFile, LoadedImage], preprocess: Union[bool, str] = True,
+                            tess_config: str = TESS_CONFIG) -> Optional[str]:
     """
     Extract text from image using OCR
     
     Args:
-        file: Uploaded image file
-        preprocess: Whether to preprocess image for better OCR
+        file: Uploaded image file or LoadedImage from load_image_once
+        preprocess: Whether to preprocess image for better OCR, or 'auto' to skip it for clean images
+        tess_config: Tesseract config (--oem/--psm/-c); TESS_WHITELIST_CONFIG restricts characters
         
     Returns:
         Extracted text or None if extraction fails
     """
     try:
-        file.file.seek(0)
-        image_bytes = file.file.read()
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Preprocess image if requested
-        if preprocess:
-            image = preprocess_image_for_ocr(image)
-        
-        # Configure Tesseract options for better accuracy
-        custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,!?-()[]{}:;"\'\ '"
-        
-        # Extract text
-        text = pytesseract.image_to_string(image, config=custom_config)
-        
-        # Clean up extracted text
-        cleaned_text = '\n'.join(line.strip() for line in text.split('\n') if line.strip())
-        
-        if not cleaned_text or len(cleaned_text.strip()) < 3:
-            logger.warning(f"Little or no text extracted from image: {file.filename}")
-            return None
-            
-        logger.info(f"Successfully extracted {len(cleaned_text)} characters from image: {file.filename}")
-        return cleaned_text
+        loaded = _as_loaded(file)
+        text = _ocr_loaded(loaded, preprocess, tess_config)
+        return _clean_ocr_text(text, file.filename)
         
     except Exception as e:
         logger.error(f"Image OCR failed for {file.filename}: {e}")
         raise HTTPException(status_code=500, detail=f"Image OCR processing failed: {str(e)}")
 
-def get_image_metadata(file: UploadFile) -> Dict:
+async def analyze_image_async(file: UploadFile, preprocess: Union[bool, str] = 'auto',
+                              tess_config: str = TESS_CONFIG) -> Tuple[Optional[str], Dict, Dict]:
     """
-    Extract metadata from image file
+    OCR an uploaded image and collect its metadata and quality assessment
+    
+    The image is decoded a single time, inside the OCR worker, and all three
+    results are computed from that one decode. At most OCR_WORKERS uploads
+    are read into memory and processed at once; others wait unread.
     
     Args:
         file: Uploaded image file
+        preprocess: Whether to preprocess image for better OCR, or 'auto' to skip it for clean images
+        tess_config: Tesseract config (--oem/--psm/-c); TESS_WHITELIST_CONFIG restricts characters
+        
+    Returns:
+        Tuple of (extracted text or None, metadata dict, quality dict)
+    """
+    try:
+        async with _get_ocr_semaphore():
+            image_bytes = await run_in_threadpool(read_image_bytes, file)
+            text, metadata, quality = await _run_in_ocr_pool(_analyze_worker, image_bytes, file.filename,
+                                                             preprocess, tess_config)
+        return _clean_ocr_text(text, file.filename), metadata, quality
+        
+    except Exception as e:
+        logger.error(f"Image analysis failed for {file.filename}: {e}")
+        raise HTTPException(status_code=500, detail=f"Image processing failed: {str(e)}")
+
+def get_image_metadata(file: Union[UploadFile, LoadedImage]) -> Dict:
+    """
+    Extract metadata from image file
+    
+    Args:
+        file: Uploaded image file or LoadedImage from load_image_once
         
     Returns:
         Dictionary containing image metadata
     """
     try:
-        file.file.seek(0)
-        image_bytes = file.file.read()
-        image = Image.open(io.BytesIO(image_bytes))
+        loaded = _as_loaded(file)
+        image = loaded.image
         
         metadata = {
             "format": image.format,
@@ -121,7 +479,7 @@ def get_image_metadata(file: UploadFile) -> Dict:
             "width": image.width,
             "height": image.height,
             "has_transparency": image.mode in ('RGBA', 'LA', 'P'),
-            "file_size": len(image_bytes)
+            "file_size": loaded.file_size
         }
         
         # Try to get EXIF data
@@ -139,33 +497,30 @@ def get_image_metadata(file: UploadFile) -> Dict:
         logger.error(f"Failed to extract image metadata: {e}")
         return {"error": str(e)}
 
-def detect_image_quality(file: UploadFile) -> Dict:
+def detect_image_quality(file: Union[UploadFile, LoadedImage]) -> Dict:
     """
     Assess image quality for OCR suitability
     
     Args:
-        file: Uploaded image file
+        file: Uploaded image file or LoadedImage from load_image_once
         
     Returns:
         Dictionary with quality assessment
     """
     try:
-        file.file.seek(0)
-        image_bytes = file.file.read()
-        image = Image.open(io.BytesIO(image_bytes))
+        loaded = _as_loaded(file)
+        image = loaded.image
         
-        # Convert to grayscale for analysis
-        if image.mode != 'L':
-            gray_image = image.convert('L')
-        else:
-            gray_image = image
-            
-        # Convert to numpy array
-        img_array = np.array(gray_image)
+        # Grayscale pixels for analysis
+        img_array = loaded.gray
+        
+        # Statistics are stable on a 2x-strided sample, which reads a quarter of the pixels
+        if img_array.shape[0] >= QUALITY_SAMPLE_MIN_SIZE and img_array.shape[1] >= QUALITY_SAMPLE_MIN_SIZE:
+            img_array = img_array[::2, ::2]
         
         # Calculate metrics
-        variance = np.var(img_array)  # Higher variance = more contrast
-        mean_brightness = np.mean(img_array)
+        variance = float(np.var(img_array))  # Higher variance = more contrast
+        mean_brightness = float(np.mean(img_array))
         
         # Assess quality
         quality_score = min(100, max(0, (variance / 1000) * 100))
@@ -193,50 +548,75 @@ def detect_image_quality(file: UploadFile) -> Dict:
         logger.error(f"Failed to assess image quality: {e}")
         return {"error": str(e), "suitable_for_ocr": False}
 
-def extract_image_regions(file: UploadFile, min_area: int = 1000) -> List[Dict]:
+def extract_image_regions(file: Union[UploadFile, LoadedImage], min_area: int = 1000) -> List[Dict]:
     """
     Detect and extract text regions from image
     
     Args:
-        file: Uploaded image file
+        file: Uploaded image file or LoadedImage from load_image_once
         min_area: Minimum area for text regions
         
     Returns:
         List of detected text regions with their properties
     """
     try:
-        file.file.seek(0)
-        image_bytes = file.file.read()
-        image = Image.open(io.BytesIO(image_bytes))
+        loaded = _as_loaded(file)
         
-        # Convert to OpenCV format
-        cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+        # Grayscale pixels in OpenCV-compatible form, capped in size for OCR
+        gray, scale = limit_image_size(loaded.gray)
         
         # Apply threshold
         _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
         
-        # Find contours
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
+        # Label connected blobs; each stats row is (x, y, width, height, area), row 0 is background
+        _, _, stats, _ = cv2.connectedComponentsWithStats(thresh, connectivity=8)
+        del thresh  # Only the stats are needed from here on; free the mask before OCR
+        
+        # Keep components large enough to hold text
+        keep = np.flatnonzero(stats[1:, cv2.CC_STAT_AREA] > min_area * scale * scale) + 1
+        boxes = [
+            (int(label), int(area), (int(x), int(y), int(w), int(h)))
+            for label, (x, y, w, h, area) in zip(keep, stats[keep])
+        ]
+        
+        if not boxes:
+            logger.info("Detected 0 text regions in image")
+            return []
+        
+        # OCR the whole image once, then assign each word to the region box containing its center
+        ocr_data = pytesseract.image_to_data(gray, config=REGION_TESS_CONFIG, output_type=pytesseract.Output.DICT)
+        
+        # Keep non-empty words and find the region box containing each word's center, as array ops
+        texts = np.char.strip(np.asarray(ocr_data['text'], dtype=str))
+        word_idx = np.flatnonzero(np.char.str_len(texts) > 0)
+        cx = (np.asarray(ocr_data['left'])[word_idx] + np.asarray(ocr_data['width'])[word_idx] / 2)[:, None]
+        cy = (np.asarray(ocr_data['top'])[word_idx] + np.asarray(ocr_data['height'])[word_idx] / 2)[:, None]
+        box_xywh = np.array([xywh for _, _, xywh in boxes])
+        inside = (
+            (cx >= box_xywh[:, 0]) & (cx < box_xywh[:, 0] + box_xywh[:, 2]) &
+            (cy >= box_xywh[:, 1]) & (cy < box_xywh[:, 1] + box_xywh[:, 3])
+        )
+        in_region = inside.any(axis=1)
+        owners = inside.argmax(axis=1)[in_region]  # First matching box per word
+        word_idx = word_idx[in_region]
+        confs = np.asarray(ocr_data['conf'], dtype=np.float32)[word_idx]
+        
+        region_words = [[] for _ in boxes]
+        for owner, idx, conf in zip(owners, word_idx, confs):
+            region_words[owner].append((str(texts[idx]), float(conf)))
+        
+        # Report boxes in original image coordinates
         regions = []
-        for i, contour in enumerate(contours):
-            area = cv2.contourArea(contour)
-            if area > min_area:
-                x, y, w, h = cv2.boundingRect(contour)
-                
-                # Extract region
-                region = gray[y:y+h, x:x+w]
-                region_text = pytesseract.image_to_string(region).strip()
-                
-                if region_text:
-                    regions.append({
-                        "region_id": i,
-                        "bbox": {"x": int(x), "y": int(y), "width": int(w), "height": int(h)},
-                        "area": int(area),
-                        "text": region_text,
-                        "confidence": len(region_text) / max(1, w * h / 1000)  # Simple confidence metric
-                    })
+        for (i, area, (x, y, w, h)), words in zip(boxes, region_words):
+            if words:
+                regions.append({
+                    "region_id": i,
+                    "bbox": {"x": round(x / scale), "y": round(y / scale),
+                             "width": round(w / scale), "height": round(h / scale)},
+                    "area": round(area / (scale * scale)),
+                    "text": " ".join(text for text, _ in words),
+                    "confidence": sum(conf for _, conf in words) / len(words) / 100  # Mean word confidence
+                })
         
         logger.info(f"Detected {len(regions)} text regions in image")
         return regions
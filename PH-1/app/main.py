@@ -3,13 +3,21 @@ EXPLAINIUM PH-1 - Smart Knowledge Extraction System
 Main FastAPI application for document processing and knowledge extraction
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Query, Request
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Query
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.templating import Jinja2Templates
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+import hashlib
 import logging
+import multiprocessing
+import os
+import threading
 
 # Import application modules
 from app.ingestion.router import validate_file_strict
@@ -37,8 +45,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize Jinja2 templates
-templates = Jinja2Templates(directory="app/templates")
+# Static pages contain no template variables, so render them once at import
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
+def _load_static_page(name: str) -> bytes:
+    with open(os.path.join(TEMPLATES_DIR, name), "rb") as f:
+        return f.read()
+
+INDEX_HTML = _load_static_page("index.html")
+INFO_HTML = _load_static_page("info.html")
+STATIC_PAGE_HEADERS = {"cache-control": "public, max-age=3600"}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Stop worker pools on shutdown"""
+    yield
+    from app.extraction.image import shutdown_ocr_pool
+    shutdown_ocr_pool()
+    if extraction_pool is not None:
+        extraction_pool.shutdown(wait=False, cancel_futures=True)
 
 # Initialize FastAPI application
 app = FastAPI(
@@ -46,13 +71,85 @@ app = FastAPI(
     description="Smart Knowledge Extraction System for industrial document processing",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Add CORS middleware
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+# Add CORS middleware with a fixed origin allowlist (comma-separated in CORS_ALLOW_ORIGINS)
+CORS_ALLOW_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ALLOW_ORIGINS", "http://localhost:8000").split(",") if origin.strip()]
+app.add_middleware(CORSMiddleware, allow_origins=CORS_ALLOW_ORIGINS, allow_credentials=False, allow_methods=["GET", "POST"], allow_headers=["content-type"])
 app.middleware("http")(exception_handler)
 
+# Worker processes for CPU-bound knowledge extraction, created on first use. They are
+# spawned, not forked, since the server process already runs threads and holds DB connections.
+extraction_pool = None
+_extraction_pool_lock = threading.Lock()
+
+# Longest wait for an extraction result before the document is marked failed
+EXTRACTION_TIMEOUT_SECONDS = 300
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    global extraction_pool
+    with _extraction_pool_lock:
+        if extraction_pool is None:
+            extraction_pool = ProcessPoolExecutor(
+                max_workers=max(1, (os.cpu_count() or 2) - 1),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return extraction_pool
+
+def discard_extraction_pool(pool: ProcessPoolExecutor):
+    """Shut down a broken extraction pool so the next call creates a fresh one"""
+    global extraction_pool
+    with _extraction_pool_lock:
+        if extraction_pool is pool:
+            extraction_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+# Recent extraction results keyed by content digest, so re-uploaded documents skip extraction
+EXTRACTION_CACHE_SIZE = 256
+_extraction_cache = OrderedDict()
+_extraction_cache_lock = threading.Lock()
+
+def _completed_future(result) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
+
+def submit_knowledge_extraction(content: str) -> Tuple[Future, Future]:
+    """Start entity extraction and classification, reusing cached results for repeated content"""
+    key = hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+    with _extraction_cache_lock:
+        cached = _extraction_cache.get(key)
+        if cached is not None:
+            _extraction_cache.move_to_end(key)
+    if cached is not None:
+        entities, categories = cached
+        return _completed_future(entities), _completed_future(categories)
+    
+    # Entities and categories are independent, so both run in parallel
+    pool = get_extraction_pool()
+    try:
+        futures = (pool.submit(extract_entities, content), pool.submit(classify_content, content))
+    except BrokenProcessPool:
+        logger.warning("Extraction worker pool broke; restarting it")
+        discard_extraction_pool(pool)
+        pool = get_extraction_pool()
+        futures = (pool.submit(extract_entities, content), pool.submit(classify_content, content))
+    
+    def cache_results(_):
+        if all(f.done() and not f.cancelled() and f.exception() is None for f in futures):
+            with _extraction_cache_lock:
+                _extraction_cache[key] = tuple(f.result() for f in futures)
+                _extraction_cache.move_to_end(key)
+                while len(_extraction_cache) > EXTRACTION_CACHE_SIZE:
+                    _extraction_cache.popitem(last=False)
+    
+    for future in futures:
+        future.add_done_callback(cache_results)
+    return futures
+
 # Database dependency
 def get_db():
     db = SessionLocal()
@@ -61,9 +158,12 @@ def get_db():
     finally:
         db.close()
 
+# Health payload is constant, so serialize it once
+HEALTH_RESPONSE_BODY = b'{"status":"healthy","service":"EXPLAINIUM Knowledge Extraction"}'
+
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "service": "EXPLAINIUM Knowledge Extraction"}
+    return Response(content=HEALTH_RESPONSE_BODY, media_type="application/json", headers={"cache-control": "no-store"})
 
 @app.get("/db-info")
 def database_info():
@@ -71,8 +171,15 @@ def database_info():
     return get_db_info()
 
 @app.get("/", response_class=HTMLResponse)
-def root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+def root():
+    return Response(content=INDEX_HTML, media_type="text/html", headers=STATIC_PAGE_HEADERS)
+
+# Text extractors for document file types
+DOCUMENT_EXTRACTORS = {
+    'pdf': extract_text_pdf,
+    'docx': extract_text_docx,
+    'txt': extract_text_txt,
+}
 
 def process_document_content(file: UploadFile, db: Session):
     """Helper function to process document content and extract knowledge"""
@@ -80,24 +187,21 @@ def process_document_content(file: UploadFile, db: Session):
     validate_file_strict(file)
     
     filetype = detect_file_type(file.filename)
-    if filetype not in ['pdf', 'docx', 'txt']:
+    extractor = DOCUMENT_EXTRACTORS.get(filetype)
+    if extractor is None:
         raise HTTPException(status_code=400, detail="Unsupported document type for knowledge extraction.")
     
     file.file.seek(0)
     
     # Extract content based on file type
-    if filetype == 'pdf':
-        content = extract_text_pdf(file)
-    elif filetype == 'docx':
-        content = extract_text_docx(file)
-    elif filetype == 'txt':
-        content = extract_text_txt(file)
-    else:
-        content = None
+    content = extractor(file)
     
     if not content or len(content.strip()) < 10:
         raise HTTPException(status_code=400, detail="No extractable content found in document.")
     
+    # Start knowledge extraction in worker processes while the document record is written
+    entities_future, categories_future = submit_knowledge_extraction(content)
+    
     # Create document record
     doc_in = DocumentCreate(
         filename=file.filename, 
@@ -110,7 +214,7 @@ def process_document_content(file: UploadFile, db: Session):
     # Perform knowledge extraction
     try:
         # Extract entities
-        entities = extract_entities(content)
+        entities = entities_future.result(timeout=EXTRACTION_TIMEOUT_SECONDS)
         db_entities = []
         for entity in entities:
             entity_create = EntityCreate(
@@ -139,7 +243,7 @@ def process_document_content(file: UploadFile, db: Session):
                 create_relationship(db, rel_create)
 
         # Classify content
-        categories = classify_content(content)
+        categories = categories_future.result(timeout=EXTRACTION_TIMEOUT_SECONDS)
         for category in categories:
             category_create = ContentCategoryCreate(
                 document_id=db_doc.id,
@@ -171,11 +275,10 @@ async def upload_image(file: UploadFile = File(...), db: Session = Depends(get_d
     if filetype != 'image':
         raise HTTPException(status_code=400, detail="Only image files are supported.")
 
-    from app.extraction.image import extract_text_from_image, get_image_metadata, detect_image_quality
+    from app.extraction.image import analyze_image_async
     try:
-        content = extract_text_from_image(file)
-        metadata = get_image_metadata(file)
-        quality = detect_image_quality(file)
+        # OCR, metadata and quality all come from a single decode in an OCR worker process
+        content, metadata, quality = await analyze_image_async(file, preprocess='auto')
     except Exception as e:
         logger.error(f"Image processing failed: {e}")
         raise HTTPException(status_code=500, detail=f"Image processing failed: {str(e)}")
@@ -200,8 +303,9 @@ async def upload_video(file: UploadFile = File(...), db: Session = Depends(get_d
 
     from app.extraction.video import extract_video_keyframes, extract_text_from_video_frames
     try:
-        frames_data = extract_video_keyframes(file, frame_interval=60, max_frames=10)
-        text_data = extract_text_from_video_frames(frames_data)
+        # Decoding and frame OCR block for seconds; run them on the threadpool
+        frames_data = await run_in_threadpool(extract_video_keyframes, file, frame_interval=60, max_frames=10)
+        text_data = await run_in_threadpool(extract_text_from_video_frames, frames_data)
         frames_extracted = len(frames_data)
         preview_frames = [f["frame_number"] for f in frames_data]
         combined_text = " ".join([f.get("text_extracted", "") for f in text_data if f.get("has_text")])
@@ -260,7 +364,6 @@ def list_documents(
     summaries = []
     for doc in documents:
         entity_count = len(get_entities_by_document(db, doc.id))
-        category_count = len(get_categories_by_document(db, doc.id))
         
         summary = DocumentSummary(
             id=doc.id,
@@ -343,8 +446,8 @@ def search_knowledge(
 
 
 @app.get("/info", response_class=HTMLResponse)
-def api_info(request: Request):
+def api_info():
     """Return information about the EXPLAINIUM system"""
-    return templates.TemplateResponse("info.html", {"request": request})
+    return Response(content=INFO_HTML, media_type="text/html", headers=STATIC_PAGE_HEADERS)
 
 
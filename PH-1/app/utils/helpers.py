@@ -7,7 +7,8 @@ import os
 import re
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union, Any
+from functools import lru_cache
+from typing import Dict, List, Literal, Optional, Tuple, Union, Any
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -66,12 +67,19 @@ SUPPORTED_TYPES = {
     '.mp4': 'video', '.avi': 'video', '.mov': 'video', '.mkv': 'video',
 }
 
+# Extension (without dot) -> file type, precomputed for detect_file_type
+_EXTENSION_TYPES = {ext[1:]: filetype for ext, filetype in SUPPORTED_TYPES.items()}
+
+@lru_cache(maxsize=2048)
 def detect_file_type(filename: str) -> Union[str, Literal['unsupported']]:
     """Detect file type based on extension"""
     if not filename:
         return 'unsupported'
-    ext = os.path.splitext(filename)[1].lower()
-    return SUPPORTED_TYPES.get(ext, 'unsupported')
+    # Same result as os.path.splitext: dots in directories and leading dots (".pdf") are not extensions
+    _, dot, ext = os.path.basename(filename).lstrip('.').rpartition('.')
+    if not dot:
+        return 'unsupported'
+    return _EXTENSION_TYPES.get(ext.lower(), 'unsupported')
 
 def clean_text(text: str, remove_extra_whitespace: bool = True, 
                remove_special_chars: bool = False) -> str: